@@ -12,6 +12,9 @@ class OrderInline(admin.TabularInline):
     can_delete = False
     show_change_link = True
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('customer__user')
+    
     def has_add_permission(self, request, obj=None):
         return False
 
@@ -23,6 +26,7 @@ class JobAdmin(admin.ModelAdmin):
     search_fields = ('job_id', 'job_name')
     readonly_fields = ('completion_time',)
     date_hierarchy = 'starting_date'
+    list_select_related = ('service_provider',)
     
     fieldsets = (
         ('Job Information', {
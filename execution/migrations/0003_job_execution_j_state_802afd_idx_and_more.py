@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-14 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("execution", "0002_alter_job_starting_date"),
+        ("provider_services", "0003_order_completed_at_order_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(fields=["state"], name="execution_j_state_802afd_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["job_type"], name="execution_j_job_typ_290104_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["service_provider", "state"],
+                name="execution_j_service_f9f3b7_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["starting_date"], name="execution_j_startin_eb0180_idx"
+            ),
+        ),
+    ]
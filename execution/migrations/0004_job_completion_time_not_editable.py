@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-15 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("execution", "0003_job_execution_j_state_802afd_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="job",
+            name="completion_time",
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                help_text="Time in days which were spent to complete the job.",
+                null=True,
+            ),
+        ),
+    ]
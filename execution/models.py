@@ -4,10 +4,45 @@ This script defines the Job model which is used to track
 the execution progress of customer orders.
 """
 from django.db import models
-from provider_services.models import Order, ServiceProvider
+from django.utils import timezone
+from provider_services.models import ChangedFieldsMixin, Order, ServiceProvider
 
 
-class Job(models.Model):
+class JobQuerySet(models.QuerySet):
+    """QuerySet of jobs with helpers for changing many jobs at once."""
+    
+    # Rows written per UPDATE by bulk_update, large enough to keep the number
+    # of queries low while bounding the size of a single statement
+    BULK_UPDATE_BATCH_SIZE = 10_000
+    
+    def bulk_transition(self, new_state, end_date=None):
+        """
+        Move all jobs of the queryset to new_state without saving them one by one.
+        
+        Without an end_date this is a single UPDATE. With an end_date the
+        completion time of each job depends on its own starting_date, so the
+        jobs are loaded once and written back with bulk_update.
+        Returns the number of updated jobs.
+        """
+        now = timezone.now()
+        if end_date is None:
+            return self.update(state=new_state, updated_at=now)
+        
+        jobs = list(self.only('pk', 'starting_date', 'completion_time'))
+        for job in jobs:
+            job.state = new_state
+            job.end_date = end_date
+            completion_time = job._derive_completion_time()
+            if completion_time is not None:
+                job.completion_time = completion_time
+            job.updated_at = now
+        return self.model.objects.bulk_update(
+            jobs, ['state', 'end_date', 'completion_time', 'updated_at'],
+            batch_size=self.BULK_UPDATE_BATCH_SIZE
+        )
+
+
+class Job(ChangedFieldsMixin, models.Model):
     """
     Model representing jobs that execute customer orders.
     A job can contain multiple orders from the same service provider.
@@ -35,27 +70,44 @@ class Job(models.Model):
     end_date = models.DateTimeField(null=True, blank=True)
     completion_time = models.FloatField(
         help_text="Time in days which were spent to complete the job.",
-        null=True, blank=True
+        null=True, blank=True, editable=False
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state']),
+            models.Index(fields=['job_type']),
+            models.Index(fields=['service_provider', 'state']),
+            models.Index(fields=['starting_date']),
+        ]
+
     def __str__(self):
         return f"{self.job_name} ({self.job_id})"
     
-    def calculate_completion_time(self):
-        """Calculate the completion time if end_date is available."""
+    def _derive_completion_time(self):
+        """Return the time in days between starting_date and end_date, if both are set."""
         if self.end_date and self.starting_date:
             delta = self.end_date - self.starting_date
-            self.completion_time = delta.total_seconds() / (24 * 3600)  # Convert to days
-            self.save(update_fields=['completion_time'])
+            return delta.total_seconds() / (24 * 3600)  # Convert to days
+        return None
     
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        # completion_time is derived from the job dates as part of the same write,
+        # so it never needs a separate UPDATE. Dates which were deferred and not
+        # loaded cannot have been changed. Without both dates the stored
+        # completion time is kept, older jobs have one but no end date.
+        completion_time = None
+        if 'starting_date' in self.__dict__ or 'end_date' in self.__dict__:
+            completion_time = self._derive_completion_time()
+        if completion_time is not None:
+            self.completion_time = completion_time
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'starting_date', 'end_date'} & set(update_fields):
+                kwargs['update_fields'] = {*update_fields, 'completion_time'}
         
-        # If the job is marked as completed and completion_time is not set,
-        # calculate it automatically
-        if self.state == 'completed' and not self.completion_time and self.end_date:
-            self.calculate_completion_time()
\ No newline at end of file
+        super().save(*args, **kwargs)
@@ -0,0 +1,171 @@
+import datetime
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from provider_services.models import ServiceProvider
+from provider_services.tests import get_updated_columns
+from .models import Job
+
+
+class JobBulkTransitionTest(TestCase):
+    """Tests for changing the state of many jobs at once"""
+
+    def setUp(self):
+        """Set up two active jobs which started on different days"""
+        service_provider = ServiceProvider.objects.create(name="Test Service Provider")
+        for i, day in enumerate([1, 11]):
+            Job.objects.create(
+                job_id=f"JOB00{i}",
+                job_name=f"Test Job {i}",
+                service_provider=service_provider,
+                state="active",
+                job_type="regular",
+                starting_date=timezone.make_aware(datetime.datetime(2023, 1, day))
+            )
+
+    def test_bulk_transition(self):
+        """Test that the state is updated in a single query"""
+        with self.assertNumQueries(1):
+            updated = Job.objects.all().bulk_transition('delayed')
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(Job.objects.filter(state='delayed').count(), 2)
+
+    def test_bulk_transition_with_end_date(self):
+        """Test that the end date and the completion time of each job are updated"""
+        end_date = timezone.make_aware(datetime.datetime(2023, 1, 21))
+
+        with self.assertNumQueries(2):
+            updated = Job.objects.all().bulk_transition('completed', end_date=end_date)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(
+            list(Job.objects.order_by('job_id').values_list('state', 'end_date', 'completion_time')),
+            [('completed', end_date, 20.0), ('completed', end_date, 10.0)]
+        )
+
+
+class JobSaveTest(TestCase):
+    """Tests for only writing the changed columns of a job"""
+
+    def setUp(self):
+        """Set up an active job"""
+        self.job = Job.objects.create(
+            job_id="JOB001",
+            job_name="Test Job",
+            service_provider=ServiceProvider.objects.create(name="Test Service Provider"),
+            state="active",
+            job_type="regular",
+            starting_date=timezone.make_aware(datetime.datetime(2023, 1, 1))
+        )
+
+    def _save_and_get_updated_columns(self, job, expected_queries=1):
+        """Save the job and return the columns written by its UPDATE"""
+        with CaptureQueriesContext(connection) as context:
+            job.save()
+        self.assertEqual(len(context.captured_queries), expected_queries)
+        sql = context.captured_queries[-1]['sql']
+        self.assertTrue(sql.startswith('UPDATE'))
+        return get_updated_columns(sql, Job)
+
+    def test_save_changed_fields(self):
+        """Test that a loaded job only writes the fields which were changed"""
+        job = Job.objects.get(pk=self.job.pk)
+        job.state = 'completed'
+        job.end_date = timezone.make_aware(datetime.datetime(2023, 1, 11))
+
+        self.assertEqual(
+            self._save_and_get_updated_columns(job),
+            {'state', 'end_date', 'completion_time', 'updated_at'}
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.state, 'completed')
+        self.assertEqual(job.completion_time, 10.0)
+
+    def test_save_unchanged(self):
+        """Test that saving an unchanged job only writes updated_at"""
+        job = Job.objects.get(pk=self.job.pk)
+
+        self.assertEqual(self._save_and_get_updated_columns(job), {'updated_at'})
+
+    def test_save_created_job(self):
+        """Test that a created job which is saved again only writes the fields changed since"""
+        self.job.job_name = "Renamed Job"
+
+        self.assertEqual(self._save_and_get_updated_columns(self.job), {'job_name', 'updated_at'})
+        self.assertEqual(Job.objects.get(pk=self.job.pk).job_name, "Renamed Job")
+
+    def test_save_deferred_fields(self):
+        """Test that fields loaded after a deferred fetch are not written back"""
+        job = Job.objects.only('pk').get(pk=self.job.pk)
+        job.state = 'failed'
+        self.assertEqual(self._save_and_get_updated_columns(job), {'state', 'updated_at'})
+
+        # The starting date is loaded to derive the completion time, but is not written
+        job = Job.objects.only('pk', 'end_date').get(pk=self.job.pk)
+        job.end_date = timezone.make_aware(datetime.datetime(2023, 1, 6))
+        self.assertEqual(
+            self._save_and_get_updated_columns(job, expected_queries=2),
+            {'end_date', 'completion_time', 'updated_at'}
+        )
+        self.assertEqual(Job.objects.get(pk=self.job.pk).completion_time, 5.0)
+
+    def test_save_after_update_fields_keeps_other_changes(self):
+        """Test that changes left out of update_fields are written by the next save"""
+        job = Job.objects.get(pk=self.job.pk)
+        job.state = 'failed'
+        job.job_name = "Renamed Job"
+        job.save(update_fields=['state'])
+
+        self.assertEqual(self._save_and_get_updated_columns(job), {'job_name', 'updated_at'})
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual((job.state, job.job_name), ('failed', "Renamed Job"))
+
+
+class JobCompletionTimeTest(TestCase):
+    """Tests for deriving Job.completion_time from the job dates"""
+
+    def setUp(self):
+        """Set up a job which started but has not ended"""
+        self.job = Job.objects.create(
+            job_id="JOB001",
+            job_name="Test Job",
+            service_provider=ServiceProvider.objects.create(name="Test Service Provider"),
+            state="active",
+            job_type="regular",
+            starting_date=timezone.make_aware(datetime.datetime(2023, 1, 1))
+        )
+
+    def test_completion_time_follows_dates(self):
+        """Test that the completion time is updated whenever the dates change"""
+        self.assertIsNone(self.job.completion_time)
+
+        job = Job.objects.get(pk=self.job.pk)
+        job.end_date = timezone.make_aware(datetime.datetime(2023, 1, 3))
+        job.save(update_fields=['end_date'])
+        self.assertEqual(Job.objects.get(pk=self.job.pk).completion_time, 2.0)
+
+        job.starting_date = timezone.make_aware(datetime.datetime(2022, 12, 31, 12))
+        job.save()
+        self.assertEqual(Job.objects.get(pk=self.job.pk).completion_time, 2.5)
+
+        # Without an end date the completion time is kept
+        job.end_date = None
+        job.save(update_fields=['end_date'])
+        self.assertEqual(Job.objects.get(pk=self.job.pk).completion_time, 2.5)
+
+    def test_completion_time_without_end_date_kept(self):
+        """Test that a job with a completion time but no end date keeps it when saved"""
+        Job.objects.filter(pk=self.job.pk).update(completion_time=7.0)
+
+        job = Job.objects.get(pk=self.job.pk)
+        job.state = 'completed'
+        job.save()
+        self.assertEqual(Job.objects.get(pk=self.job.pk).completion_time, 7.0)
+
+        job.starting_date = None
+        job.end_date = timezone.make_aware(datetime.datetime(2023, 1, 3))
+        job.save()
+        self.assertEqual(Job.objects.get(pk=self.job.pk).completion_time, 7.0)
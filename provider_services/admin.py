@@ -13,12 +13,14 @@ class ServiceProviderAdmin(admin.ModelAdmin):
 class AccountManagerAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'user', 'is_active')
     list_filter = ('is_active',)
+    search_fields = ('user__username', 'user__first_name', 'user__last_name')
     filter_horizontal = ('service_providers',)
 
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'user', 'created_at')
+    search_fields = ('user__username', 'user__first_name', 'user__last_name')
     filter_horizontal = ('account_managers',)
 
 
@@ -26,19 +28,32 @@ class CustomerAdmin(admin.ModelAdmin):
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ('name', 'service_provider', 'price', 'is_active')
     list_filter = ('service_provider', 'is_active')
+    list_select_related = ('service_provider',)
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 1
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_related()
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # Every option of the service select displays the service provider
+        if db_field.name == 'service':
+            kwargs['queryset'] = Service.objects.with_related()
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'customer', 'account_manager', 'status', 'total_price')
-    list_filter = ('status', 'account_manager')
+    list_filter = ('status',)
+    search_fields = ('id', 'title', 'customer__user__username', 'account_manager__user__username')
+    autocomplete_fields = ('customer', 'account_manager', 'job')
     inlines = [OrderItemInline]
     readonly_fields = ('total_price',)
+    list_select_related = ('customer__user', 'account_manager__user', 'job')
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
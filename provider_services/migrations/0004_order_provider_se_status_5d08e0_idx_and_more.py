@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-14 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("execution", "0003_job_execution_j_state_802afd_idx_and_more"),
+        ("provider_services", "0003_order_completed_at_order_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["status"], name="provider_se_status_5d08e0_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["account_manager", "status"],
+                name="provider_se_account_dbe8db_idx",
+            ),
+        ),
+    ]
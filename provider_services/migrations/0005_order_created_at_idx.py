@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-15 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("execution", "0004_job_completion_time_not_editable"),
+        ("provider_services", "0004_order_provider_se_status_5d08e0_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_at"], name="provider_se_created_581975_idx"
+            ),
+        ),
+    ]
@@ -1,9 +1,78 @@
 from django.db import models
+from django.db.models import DecimalField, F, Sum
 from django.contrib.auth.models import User, Group
 from django.utils import timezone
+from decimal import Decimal
 import uuid
 
 
+def _add_user_to_group(user_id, group_name):
+    """Make the user a member of the named group"""
+    group, created = Group.objects.get_or_create(name=group_name)
+    UserGroups = User.groups.through
+    # Rely on the unique constraint instead of checking for an existing membership first
+    UserGroups.objects.bulk_create(
+        [UserGroups(user_id=user_id, group_id=group.pk)],
+        ignore_conflicts=True
+    )
+
+
+class ChangedFieldsMixin:
+    """
+    Mixin for models which only write the fields changed since they were loaded.
+    
+    The values loaded from the database are kept, a save() without update_fields
+    of a loaded instance then writes the changed fields and the auto_now fields.
+    """
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Deferred fields are loaded through here, they are loaded values and not changes
+        self._remember_loaded_values(fields)
+    
+    def _remember_loaded_values(self, fields=None):
+        """Store the current values of the given fields, or of all loaded fields, as loaded."""
+        loaded_values = getattr(self, '_loaded_values', {})
+        loaded_values.update(
+            (field.attname, getattr(self, field.attname)) for field in self._meta.concrete_fields
+            if (fields is None or field.name in fields or field.attname in fields)
+            and field.attname in self.__dict__
+        )
+        self._loaded_values = loaded_values
+    
+    def _get_changed_fields(self):
+        """Return the names of the loaded fields which were modified since loading."""
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return None
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname in self.__dict__
+            and (field.attname not in loaded_values
+                 or loaded_values[field.attname] != getattr(self, field.attname))
+        ]
+    
+    def save(self, *args, **kwargs):
+        changed_fields = self._get_changed_fields()
+        if not self._state.adding and changed_fields is not None and not args \
+                and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            auto_now_fields = [
+                field.attname for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)
+            ]
+            kwargs['update_fields'] = {*changed_fields, *auto_now_fields}
+        
+        super().save(*args, **kwargs)
+        # Only the written fields match the database now, other changes are still unsaved
+        self._remember_loaded_values(kwargs.get('update_fields'))
+
+
 class ServiceProvider(models.Model):
     """
     Model representing service providers in the digital platform.
@@ -37,11 +106,19 @@ class AccountManager(models.Model):
             return f"{self.user.first_name} {self.user.last_name}"
         return f"{self.user.username} (Account Manager)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._orig_user_id = instance.__dict__.get('user_id')
+        return instance
+    
     def save(self, *args, **kwargs):
         """Ensure the user is in the account_manager group"""
+        user_changed = self._state.adding or getattr(self, '_orig_user_id', None) != self.user_id
         super().save(*args, **kwargs)
-        account_manager_group, created = Group.objects.get_or_create(name='account_manager')
-        self.user.groups.add(account_manager_group)
+        if user_changed:
+            _add_user_to_group(self.user_id, 'account_manager')
+            self._orig_user_id = self.user_id
 
 
 class Customer(models.Model):
@@ -59,11 +136,25 @@ class Customer(models.Model):
             return f"{self.user.first_name} {self.user.last_name}"
         return f"{self.user.username} (Customer)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._orig_user_id = instance.__dict__.get('user_id')
+        return instance
+    
     def save(self, *args, **kwargs):
         """Ensure the user is in the customer group"""
+        user_changed = self._state.adding or getattr(self, '_orig_user_id', None) != self.user_id
         super().save(*args, **kwargs)
-        customer_group, created = Group.objects.get_or_create(name='customer')
-        self.user.groups.add(customer_group)
+        if user_changed:
+            _add_user_to_group(self.user_id, 'customer')
+            self._orig_user_id = self.user_id
+
+
+class ServiceQuerySet(models.QuerySet):
+    def with_related(self):
+        """Join the service provider which is read when displaying a service"""
+        return self.select_related('service_provider')
 
 
 class Service(models.Model):
@@ -78,11 +169,13 @@ class Service(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ServiceQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.name} ({self.service_provider.name})"
 
 
-class Order(models.Model):
+class Order(ChangedFieldsMixin, models.Model):
     """
     Model representing customer orders.
     An order is created by a customer and managed by a specific account manager.
@@ -112,32 +205,62 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status']),
+            models.Index(fields=['account_manager', 'status']),
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"Order {self.id} - {self.customer}"
     
     def update_total_price(self):
         """Calculate and update the total price of the order"""
-        self.total_price = sum(item.price * item.quantity for item in self.items.all())
-        self.save()
+        total = self.items.aggregate(
+            total=Sum(F('price') * F('quantity'), output_field=DecimalField())
+        )['total'] or 0
+        Order.objects.filter(pk=self.pk).update(total_price=total)
+        self.total_price = total
+        self._remember_loaded_values(['total_price'])
+    
+    def _add_to_total_price(self, delta):
+        """Add delta, which was already added in the database, to the loaded total price"""
+        # A deferred total price is loaded with the delta already included
+        if 'total_price' in self.__dict__:
+            self.total_price += delta
+            self._remember_loaded_values(['total_price'])
+    
+    def _is_completing(self):
+        """
+        Return whether the order is completed by this save.
+        
+        The loaded status is compared without fetching the row again. A status
+        which was deferred and not set cannot have changed.
+        """
+        if 'status' not in self.__dict__ or self.status != 'completed':
+            return False
+        loaded_values = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded_values is None:
+            return True
+        return 'status' in loaded_values and loaded_values['status'] != 'completed'
     
     def save(self, *args, **kwargs):
         # If status changed to completed, update completed_at
-        if self.pk is not None:
-            try:
-                old_instance = Order.objects.get(pk=self.pk)
-                if old_instance.status != 'completed' and self.status == 'completed':
-                    self.completed_at = timezone.now()
-            except Order.DoesNotExist:
-                # Handle the case when the object is being created
-                if self.status == 'completed':
-                    self.completed_at = timezone.now()
-        elif self.status == 'completed':
+        if self._is_completing():
             self.completed_at = timezone.now()
-            
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'status' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        
         super().save(*args, **kwargs)
 
 
+class OrderItemQuerySet(models.QuerySet):
+    def with_related(self):
+        """Join the service and its provider which are read when displaying an item"""
+        return self.select_related('service__service_provider')
+
+
 class OrderItem(models.Model):
     """
     Model representing services added to an order.
@@ -148,14 +271,96 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)  # Price at the time of order
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = OrderItemQuerySet.as_manager()
+    
     def __str__(self):
-        return f"{self.service.name} ({self.quantity}) - Order {self.order.id}"
+        return f"{self.service.name} ({self.quantity}) - Order {self.order_id}"
+    
+    @classmethod
+    def bulk_add(cls, order, items):
+        """
+        Add many items to an order at once.
+        
+        Inserts the items in batches and adjusts the order total price a single
+        time, instead of once per item as calling save() on each item would.
+        """
+        # Fetch the missing prices of services which are not loaded in one query
+        service_ids = {
+            item.service_id for item in items
+            if not item.price and not OrderItem.service.is_cached(item)
+        }
+        service_prices = dict(
+            Service.objects.filter(pk__in=service_ids).values_list('pk', 'price')
+        ) if service_ids else {}
+        
+        for item in items:
+            item.order = order
+            if not item.price:
+                item.price = service_prices.get(item.service_id) or item.service.price
+        
+        created = cls.objects.bulk_create(items, batch_size=1000)
+        
+        # The new items only add to the total, so there is no need to aggregate all items again
+        total = sum((item.line_total for item in created), Decimal('0'))
+        if total:
+            Order.objects.filter(pk=order.pk).update(total_price=F('total_price') + total)
+            order._add_to_total_price(total)
+        for item in created:
+            item._orig_order_id = item.order_id
+            item._orig_line_total = item.line_total
+        return created
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what this item contributed to its order's total price
+        loaded_values = dict(zip(field_names, values))
+        instance._orig_order_id = loaded_values.get('order_id')
+        if loaded_values.get('price') is not None and loaded_values.get('quantity') is not None:
+            instance._orig_line_total = loaded_values['price'] * loaded_values['quantity']
+        return instance
+    
+    @property
+    def line_total(self):
+        """Price of this item multiplied by its quantity"""
+        return self.price * self.quantity
+    
+    def _add_to_order_total(self, order_id, delta):
+        """Adjust the total price of an order in the database by delta"""
+        if not delta:
+            return
+        Order.objects.filter(pk=order_id).update(total_price=F('total_price') + delta)
+        if OrderItem.order.is_cached(self) and self.order.pk == order_id:
+            self.order._add_to_total_price(delta)
     
     def save(self, *args, **kwargs):
         # Set the price of the order item to the service price if not provided
         if not self.price:
             self.price = self.service.price
+        
+        is_new = self._state.adding
+        orig_order_id = getattr(self, '_orig_order_id', None)
+        orig_line_total = getattr(self, '_orig_line_total', None)
             
         super().save(*args, **kwargs)
-        # Update order total price
-        self.order.update_total_price()
+        
+        # Update order total price by the change of this item only
+        if is_new:
+            self._add_to_order_total(self.order_id, self.line_total)
+        elif orig_line_total is None:
+            self.order.update_total_price()
+        elif orig_order_id != self.order_id:
+            self._add_to_order_total(orig_order_id, -orig_line_total)
+            self._add_to_order_total(self.order_id, self.line_total)
+        else:
+            self._add_to_order_total(self.order_id, self.line_total - orig_line_total)
+        
+        self._orig_order_id = self.order_id
+        self._orig_line_total = self.line_total
+    
+    def delete(self, *args, **kwargs):
+        order_id = self.order_id
+        line_total = getattr(self, '_orig_line_total', self.line_total)
+        result = super().delete(*args, **kwargs)
+        self._add_to_order_total(order_id, -line_total)
+        return result
\ No newline at end of file
@@ -1,3 +1,291 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.db import connection
+from django.contrib import admin
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth.models import User, Group
 
-# Create your tests here.
+from .admin import OrderItemInline
+from .models import AccountManager, Customer, ServiceProvider, Service, Order, OrderItem
+
+
+def get_updated_columns(sql, model):
+    """Return the columns of the model which are set by the UPDATE statement sql"""
+    assignments = sql.split(' WHERE ')[0]
+    return {
+        field.column for field in model._meta.concrete_fields
+        if f"{connection.ops.quote_name(field.column)} = " in assignments
+    }
+
+
+class OrderTotalPriceTest(TestCase):
+    """Tests for keeping Order.total_price in sync with its items"""
+
+    def setUp(self):
+        """Set up an order with a single service to add items for"""
+        self.service_provider = ServiceProvider.objects.create(name="Test Service Provider")
+        self.service = Service.objects.create(
+            name="Test Service",
+            service_provider=self.service_provider,
+            description="Test service",
+            price=Decimal("25.00")
+        )
+        self.account_manager = AccountManager.objects.create(
+            user=User.objects.create(username="manager", password="password")
+        )
+        self.customer = Customer.objects.create(
+            user=User.objects.create(username="customer", password="password")
+        )
+        self.order = Order.objects.create(
+            customer=self.customer,
+            account_manager=self.account_manager,
+            title="Test Order"
+        )
+
+    def test_update_total_price(self):
+        """Test that the total price is the sum of price * quantity of all items"""
+        OrderItem.objects.create(order=self.order, service=self.service, quantity=2)
+        OrderItem.objects.create(order=self.order, service=self.service, quantity=1, price=Decimal("10.00"))
+
+        self.order.update_total_price()
+
+        self.assertEqual(self.order.total_price, Decimal("60.00"))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, Decimal("60.00"))
+
+    def test_bulk_add(self):
+        """Test that bulk added items get the service price and update the total once"""
+        items = [OrderItem(service=self.service, quantity=1) for _ in range(3)]
+
+        with self.assertNumQueries(2):
+            OrderItem.bulk_add(self.order, items)
+
+        self.assertEqual(self.order.items.count(), 3)
+        self.assertEqual(self.order.total_price, Decimal("75.00"))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, Decimal("75.00"))
+
+    def test_bulk_add_by_service_id(self):
+        """Test that the prices of services given by id are fetched in a single query"""
+        OrderItem.objects.create(order=self.order, service=self.service, quantity=1)
+        items = [OrderItem(service_id=self.service.pk, quantity=2) for _ in range(3)]
+
+        with self.assertNumQueries(3):
+            OrderItem.bulk_add(self.order, items)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, Decimal("175.00"))
+
+    def test_with_related(self):
+        """Test that items fetched with their related rows are displayed without further queries"""
+        OrderItem.bulk_add(self.order, [OrderItem(service=self.service) for _ in range(3)])
+
+        with self.assertNumQueries(1):
+            names = [str(item) for item in OrderItem.objects.with_related()]
+
+        self.assertEqual(names, [f"Test Service (1) - Order {self.order.id}"] * 3)
+
+    def test_item_inline_service_choices(self):
+        """Test that the service choices of the order item inline are displayed in a single query"""
+        Service.objects.create(
+            name="Other Service",
+            service_provider=ServiceProvider.objects.create(name="Other Service Provider"),
+            description="Other service",
+            price=Decimal("10.00")
+        )
+        inline = OrderItemInline(Order, admin.site)
+        request = RequestFactory().get('/')
+        request.user = self.account_manager.user
+
+        formfield = inline.formfield_for_foreignkey(OrderItem._meta.get_field('service'), request)
+        with self.assertNumQueries(1):
+            labels = [label for value, label in formfield.choices if value]
+
+        self.assertCountEqual(
+            labels, ["Test Service (Test Service Provider)", "Other Service (Other Service Provider)"]
+        )
+
+    def test_item_changes_adjust_total_price(self):
+        """Test that saving and deleting items adjusts the total price incrementally"""
+        item = OrderItem.objects.create(order=self.order, service=self.service, quantity=2)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, Decimal("50.00"))
+
+        item = OrderItem.objects.get(pk=item.pk)
+        item.quantity = 3
+        item.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, Decimal("75.00"))
+
+        item.delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, Decimal("0.00"))
+
+    def test_stale_order_save_keeps_total_price(self):
+        """Test that saving an order loaded before its items were added keeps the total price"""
+        stale_order = Order.objects.get(pk=self.order.pk)
+        OrderItem.objects.create(order_id=self.order.pk, service=self.service, quantity=1)
+
+        stale_order.title = "Renamed Order"
+        stale_order.save()
+        OrderItem.objects.create(order_id=self.order.pk, service=self.service, quantity=1)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.title, "Renamed Order")
+        self.assertEqual(self.order.total_price, Decimal("50.00"))
+
+    def test_save_total_price(self):
+        """Test that a total price set on the order is saved, also after items were added"""
+        self.order.total_price = Decimal("99.00")
+        self.order.save()
+        self.assertEqual(Order.objects.get(pk=self.order.pk).total_price, Decimal("99.00"))
+
+        OrderItem.objects.create(order=self.order, service=self.service, quantity=1)
+        self.assertEqual(self.order.total_price, Decimal("124.00"))
+        self.order.title = "Renamed Order"
+        with self.assertNumQueries(1):
+            self.order.save()
+        self.assertEqual(Order.objects.get(pk=self.order.pk).total_price, Decimal("124.00"))
+
+
+class OrderCompletionTest(TestCase):
+    """Tests for setting Order.completed_at when an order is completed"""
+
+    def setUp(self):
+        """Set up a submitted order"""
+        self.order = Order.objects.create(
+            customer=Customer.objects.create(
+                user=User.objects.create(username="customer", password="password")
+            ),
+            account_manager=AccountManager.objects.create(
+                user=User.objects.create(username="manager", password="password")
+            ),
+            title="Test Order",
+            status="submitted"
+        )
+
+    def test_completed_at_set_on_transition(self):
+        """Test that completed_at is set once, without re-fetching the order"""
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertIsNone(order.completed_at)
+
+        order.status = 'completed'
+        with self.assertNumQueries(1):
+            order.save(update_fields=['status'])
+
+        order.refresh_from_db()
+        completed_at = order.completed_at
+        self.assertIsNotNone(completed_at)
+
+        # Saving an already completed order keeps the original completion time
+        order.title = "Renamed Order"
+        order.save()
+        order.refresh_from_db()
+        self.assertEqual(order.completed_at, completed_at)
+
+    def test_deferred_completed_order_keeps_completed_at(self):
+        """Test that saving a completed order loaded without its status keeps completed_at"""
+        Order.objects.filter(pk=self.order.pk).update(status='completed', completed_at=timezone.now())
+        completed_at = Order.objects.get(pk=self.order.pk).completed_at
+
+        order = Order.objects.only('title').get(pk=self.order.pk)
+        order.title = "Renamed Order"
+        order.save()
+
+        self.assertEqual(Order.objects.get(pk=self.order.pk).completed_at, completed_at)
+
+    def test_refreshed_completed_order_keeps_completed_at(self):
+        """Test that an order refreshed after it was completed elsewhere keeps completed_at"""
+        order = Order.objects.get(pk=self.order.pk)
+        other = Order.objects.get(pk=self.order.pk)
+        other.status = 'completed'
+        other.save()
+        completed_at = Order.objects.get(pk=self.order.pk).completed_at
+
+        order.refresh_from_db()
+        order.title = "Renamed Order"
+        order.save()
+
+        self.assertEqual(Order.objects.get(pk=self.order.pk).completed_at, completed_at)
+
+    def test_save_changed_fields(self):
+        """Test that a loaded order only writes the fields which were changed"""
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'completed'
+
+        with CaptureQueriesContext(connection) as context:
+            order.save()
+
+        self.assertEqual(len(context.captured_queries), 1)
+        sql = context.captured_queries[0]['sql']
+        self.assertEqual(get_updated_columns(sql, Order), {'status', 'completed_at', 'updated_at'})
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'completed')
+        self.assertIsNotNone(order.completed_at)
+
+    def test_save_after_update_fields_keeps_other_changes(self):
+        """Test that changes left out of update_fields are written by the next save"""
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'in_progress'
+        order.title = "Renamed Order"
+        order.save(update_fields=['status'])
+        order.save()
+
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.status, order.title), ('in_progress', "Renamed Order"))
+
+
+class ProfileGroupTest(TestCase):
+    """Tests for adding account managers and customers to their role group"""
+
+    def test_profile_user_added_to_group(self):
+        """Test that the user joins the group on create and later saves skip it"""
+        user = User.objects.create(username="manager", password="password")
+        account_manager = AccountManager.objects.create(user=user)
+        self.assertTrue(user.groups.filter(name='account_manager').exists())
+
+        account_manager = AccountManager.objects.get(pk=account_manager.pk)
+        account_manager.phone = "0123456789"
+        with self.assertNumQueries(1):
+            account_manager.save()
+
+        customer = Customer.objects.create(user=user)
+        self.assertTrue(user.groups.filter(name='customer').exists())
+
+        # The instance returned by create() also remembers its user
+        customer.phone = "0123456789"
+        with self.assertNumQueries(1):
+            customer.save()
+
+    def test_existing_member_added_to_group(self):
+        """Test that a user who is already a member of the group keeps a single membership"""
+        user = User.objects.create(username="manager", password="password")
+        user.groups.add(Group.objects.create(name='account_manager'))
+
+        AccountManager.objects.create(user=user)
+
+        self.assertEqual(user.groups.filter(name='account_manager').count(), 1)
+
+    def test_changed_profile_user_added_to_group(self):
+        """Test that a profile moved to another user adds that user to the group"""
+        customer = Customer.objects.create(
+            user=User.objects.create(username="customer", password="password")
+        )
+        other_user = User.objects.create(username="other", password="password")
+
+        customer = Customer.objects.get(pk=customer.pk)
+        customer.user = other_user
+        customer.save()
+
+        self.assertTrue(other_user.groups.filter(name='customer').exists())
+
+    def test_recreated_group(self):
+        """Test that users are added to a group which was deleted and created again"""
+        AccountManager.objects.create(user=User.objects.create(username="manager", password="password"))
+        Group.objects.filter(name='account_manager').delete()
+
+        user = User.objects.create(username="other", password="password")
+        AccountManager.objects.create(user=user)
+
+        self.assertTrue(user.groups.filter(name='account_manager').exists())
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Report, JobReportResult, OrderReportResult, UserReportResult
+from .models import Report, JobReportResult, OrderReportResult, UserReportResult, ReportLeaderboardEntry
 
 
 class JobReportResultInline(admin.StackedInline):
@@ -45,6 +45,20 @@ class UserReportResultInline(admin.StackedInline):
         return False
 
 
+class ReportLeaderboardEntryInline(admin.TabularInline):
+    model = ReportLeaderboardEntry
+    can_delete = False
+    verbose_name_plural = 'Leaderboard'
+    fields = ('kind', 'rank', 'user', 'orders_count', 'revenue')
+    readonly_fields = fields
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
     list_display = (
@@ -65,7 +79,12 @@ class ReportAdmin(admin.ModelAdmin):
             'fields': ('created_by', 'created_at', 'pdf_report')
         }),
     )
-    inlines = [JobReportResultInline, OrderReportResultInline, UserReportResultInline]
+    inlines = [
+        JobReportResultInline, OrderReportResultInline, UserReportResultInline, ReportLeaderboardEntryInline
+    ]
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('created_by')
     
     def time_period_display(self, obj):
         return f"{obj.quarter_from} {obj.year_from} - {obj.quarter_to} {obj.year_to}"
@@ -95,6 +114,11 @@ class JobReportResultAdmin(admin.ModelAdmin):
         'jobs_created', 'jobs_active', 'jobs_completed', 'jobs_failed', 'jobs_delayed'
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('report').defer(
+            'report__description', 'report__pdf_report'
+        )
+    
     def report_title(self, obj):
         return obj.report.title
     report_title.short_description = "Report"
@@ -117,6 +141,11 @@ class OrderReportResultAdmin(admin.ModelAdmin):
         'orders_completed', 'orders_cancelled', 'avg_processing_time'
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('report').defer(
+            'report__description', 'report__pdf_report'
+        )
+    
     def report_title(self, obj):
         return obj.report.title
     report_title.short_description = "Report"
@@ -139,6 +168,11 @@ class UserReportResultAdmin(admin.ModelAdmin):
         'total_orders_by_top_manager', 'total_revenue_by_top_manager'
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'report', 'top_performing_account_manager', 'top_customer'
+        ).defer('report__description', 'report__pdf_report')
+    
     def report_title(self, obj):
         return obj.report.title
     report_title.short_description = "Report"
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-14 19:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stat_analysis", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["year_from", "quarter_from"],
+                name="stat_analys_year_fr_3f7143_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["year_to", "quarter_to"], name="stat_analys_year_to_a676d1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                fields=["report_type"], name="stat_analys_report__9ac6c4_idx"
+            ),
+        ),
+    ]
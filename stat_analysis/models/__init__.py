@@ -2,6 +2,6 @@
 Model initialization for stat_analysis app.
 """
 from .report import Report
-from .statistics import JobReportResult, OrderReportResult, UserReportResult
+from .statistics import JobReportResult, OrderReportResult, UserReportResult, ReportLeaderboardEntry
 
-__all__ = ['Report', 'JobReportResult', 'OrderReportResult', 'UserReportResult']
\ No newline at end of file
+__all__ = ['Report', 'JobReportResult', 'OrderReportResult', 'UserReportResult', 'ReportLeaderboardEntry']
\ No newline at end of file
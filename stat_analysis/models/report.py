@@ -2,9 +2,13 @@
 
 This script defines the Report model for generating statistical reports.
 """
-from django.db import models
+import logging
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
+logger = logging.getLogger(__name__)
+
 
 class Report(models.Model):
     """
@@ -44,19 +48,64 @@ class Report(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['year_from', 'quarter_from']),
+            models.Index(fields=['year_to', 'quarter_to']),
+            models.Index(fields=['report_type']),
+        ]
         
     def __str__(self):
         return f"{self.title} ({self.get_report_type_display()}, {self.year_from} {self.quarter_from} - {self.year_to} {self.quarter_to})"
     
+    # Fields which determine the statistics of the report
+    SETTINGS_FIELDS = ('report_type', 'quarter_from', 'year_from', 'quarter_to', 'year_to')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded settings so save() can tell if the statistics are stale
+        instance._orig_settings = instance._get_loaded_settings()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Deferred settings are loaded through here, they are loaded values and not changes
+        if hasattr(self, '_orig_settings'):
+            self._orig_settings.update(
+                (name, value) for name, value in self._get_loaded_settings().items()
+                if fields is None or name in fields
+            )
+    
+    def _get_loaded_settings(self):
+        """Return the settings of the report which are loaded, without loading deferred ones."""
+        return {name: self.__dict__[name] for name in self.SETTINGS_FIELDS if name in self.__dict__}
+    
     def save(self, *args, **kwargs):
         """
-        Override save method to trigger statistics calculation when report is created or updated
+        Override save method to trigger statistics calculation when report is created or
+        when its type or time range is updated.
+        
+        The calculation runs right after the surrounding transaction is committed,
+        still within the same request. The report is committed by then, so a failed
+        calculation is logged instead of failing the request.
         """
-        is_new = self.pk is None
+        orig_settings = getattr(self, '_orig_settings', None)
+        settings_changed = orig_settings is None or any(
+            name not in orig_settings or orig_settings[name] != value
+            for name, value in self._get_loaded_settings().items()
+        )
         super().save(*args, **kwargs)
+        self._orig_settings = self._get_loaded_settings()
         
+        if settings_changed:
+            transaction.on_commit(self._calculate_statistics)
+    
+    def _calculate_statistics(self):
+        """Calculate the statistics of the report, logging a failure"""
         # Import here to avoid circular imports
         from stat_analysis.stat_utils import calculate_report_statistics
         
-        # Calculate statistics for this report
-        calculate_report_statistics(self)
\ No newline at end of file
+        try:
+            calculate_report_statistics(self)
+        except Exception:
+            logger.exception("Calculating the statistics of report %s failed", self.pk)
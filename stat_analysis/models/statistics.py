@@ -105,4 +105,36 @@ class UserReportResult(models.Model):
         verbose_name_plural = "User Report Results"
     
     def __str__(self):
-        return f"User Activity Statistics for {self.report.title}"
\ No newline at end of file
+        return f"User Activity Statistics for {self.report.title}"
+
+
+class ReportLeaderboardEntry(models.Model):
+    """
+    Model to store the ranking of account managers and customers of a report.
+    
+    The entries are written once when the report statistics are calculated,
+    ranked by the number of orders in the report's time range.
+    """
+    KIND_CHOICES = [
+        ('manager', 'Account Manager'),
+        ('customer', 'Customer'),
+    ]
+    
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    rank = models.PositiveIntegerField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='leaderboard_entries')
+    
+    orders_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = "Report Leaderboard Entry"
+        verbose_name_plural = "Report Leaderboard Entries"
+        ordering = ['kind', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['report', 'kind', 'rank'], name='unique_leaderboard_rank'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.rank} {self.get_kind_display()} for {self.report.title}"
\ No newline at end of file
@@ -1,45 +1,57 @@
 import datetime
+import functools
 from decimal import Decimal
-from django.db.models import Avg, Count, Sum, F, ExpressionWrapper, fields
-from django.db import models
+from django.db.models import Avg, Count, Sum, F, Q, ExpressionWrapper, fields
+from django.db import transaction
 from django.apps import apps
-from django.contrib.auth.models import User
 from django.utils import timezone
 
-# Dynamic model imports to avoid circular imports
+# (month, day) of the first and last day of each quarter
+QUARTER_BOUNDS = {
+    'Q1': ((1, 1), (3, 31)),
+    'Q2': ((4, 1), (6, 30)),
+    'Q3': ((7, 1), (9, 30)),
+    'Q4': ((10, 1), (12, 31)),
+}
+
+# Number of account managers and customers ranked on a report leaderboard
+LEADERBOARD_SIZE = 10
+
+
+# Dynamic model imports to avoid circular imports,
+# cached as the app registry does not change once it is ready
+@functools.lru_cache(maxsize=None)
 def get_model(app_label, model_name):
     return apps.get_model(app_label, model_name)
 
 
+@transaction.atomic
 def calculate_report_statistics(report):
-    """Main function to calculate all statistics for a report based on its type."""
+    """
+    Main function to calculate all statistics for a report based on its type.
+    
+    All results are written in a single transaction, so a report never keeps
+    part of the statistics of a failed calculation.
+    """
+    date_range = get_date_range_for_report(report)
+    
     if report.report_type in ['job', 'combined']:
-        calculate_job_statistics(report)
+        calculate_job_statistics(report, date_range)
     
     if report.report_type in ['order', 'combined']:
-        calculate_order_statistics(report)
+        calculate_order_statistics(report, date_range)
         
     if report.report_type in ['user', 'combined']:
-        calculate_user_statistics(report)
+        calculate_user_statistics(report, date_range)
 
 
 def get_quarter_dates(quarter, year):
     """Convert quarter and year to start and end dates."""
-    if quarter == 'Q1':
-        start_date = datetime.date(year, 1, 1)
-        end_date = datetime.date(year, 3, 31)
-    elif quarter == 'Q2':
-        start_date = datetime.date(year, 4, 1)
-        end_date = datetime.date(year, 6, 30)
-    elif quarter == 'Q3':
-        start_date = datetime.date(year, 7, 1)
-        end_date = datetime.date(year, 9, 30)
-    elif quarter == 'Q4':
-        start_date = datetime.date(year, 10, 1)
-        end_date = datetime.date(year, 12, 31)
-    else:
+    try:
+        (start_month, start_day), (end_month, end_day) = QUARTER_BOUNDS[quarter]
+    except KeyError:
         raise ValueError("Invalid quarter. Please use 'Q1', 'Q2', 'Q3', or 'Q4'.")
-    return start_date, end_date
+    return datetime.date(year, start_month, start_day), datetime.date(year, end_month, end_day)
 
 
 def get_date_range_for_report(report):
@@ -57,41 +69,41 @@ def get_date_range_for_report(report):
     return start_datetime, end_datetime
 
 
-def calculate_job_statistics(report):
-    """Calculate job statistics for the report's time range."""
+def calculate_job_statistics(report, date_range=None):
+    """
+    Calculate job statistics for the report's time range.
+    
+    date_range can be given to reuse the result of get_date_range_for_report.
+    """
     Job = get_model("execution", "Job")
     JobReportResult = get_model("stat_analysis", "JobReportResult")
     
-    start_date, end_date = get_date_range_for_report(report)
+    start_date, end_date = date_range or get_date_range_for_report(report)
     
     # Get all jobs in the time range
     jobs_in_period = Job.objects.filter(
-        starting_date__gte=start_date,
-        starting_date__lte=end_date
+        starting_date__range=(start_date, end_date)
     )
     
-    # Calculate total jobs
-    total_jobs = jobs_in_period.count()
-    
-    # Calculate average completion time per job type
-    completed_jobs = jobs_in_period.filter(state='completed')
-    avg_completion_regular = completed_jobs.filter(job_type='regular').aggregate(
-        avg=Avg('completion_time')
-    )['avg'] or 0
-    
-    avg_completion_wafer_run = completed_jobs.filter(job_type='wafer_run').aggregate(
-        avg=Avg('completion_time')
-    )['avg'] or 0
-    
-    # Calculate jobs per status
-    jobs_created = jobs_in_period.filter(state='created').count()
-    jobs_active = jobs_in_period.filter(state='active').count()
-    jobs_completed = jobs_in_period.filter(state='completed').count()
-    jobs_failed = jobs_in_period.filter(state='failed').count()
-    jobs_delayed = jobs_in_period.filter(state='delayed').count()
+    # Calculate total jobs, average completion time per job type and jobs
+    # per status in a single pass over the jobs in the period
+    job_stats = jobs_in_period.aggregate(
+        total_jobs=Count('pk'),
+        avg_completion_regular=Avg('completion_time', filter=Q(state='completed', job_type='regular')),
+        avg_completion_wafer_run=Avg('completion_time', filter=Q(state='completed', job_type='wafer_run')),
+        **{f'jobs_{state}': Count('pk', filter=Q(state=state)) for state, _ in Job.STATE_CHOICES}
+    )
+    total_jobs = job_stats['total_jobs']
+    avg_completion_regular = job_stats['avg_completion_regular'] or 0
+    avg_completion_wafer_run = job_stats['avg_completion_wafer_run'] or 0
+    jobs_created = job_stats['jobs_created']
+    jobs_active = job_stats['jobs_active']
+    jobs_completed = job_stats['jobs_completed']
+    jobs_failed = job_stats['jobs_failed']
+    jobs_delayed = job_stats['jobs_delayed']
     
-    # Get or create job report result
-    job_result, created = JobReportResult.objects.get_or_create(
+    # Create or update job report result
+    job_result, _ = JobReportResult.objects.update_or_create(
         report=report,
         defaults={
             'total_jobs': total_jobs,
@@ -105,66 +117,61 @@ def calculate_job_statistics(report):
         }
     )
     
-    if not created:
-        # Update existing report
-        job_result.total_jobs = total_jobs
-        job_result.avg_completion_time_regular = avg_completion_regular
-        job_result.avg_completion_time_wafer_run = avg_completion_wafer_run
-        job_result.jobs_created = jobs_created
-        job_result.jobs_active = jobs_active
-        job_result.jobs_completed = jobs_completed
-        job_result.jobs_failed = jobs_failed
-        job_result.jobs_delayed = jobs_delayed
-        job_result.save()
-    
     return job_result
 
 
-def calculate_order_statistics(report):
-    """Calculate order statistics for the report's time range."""
+def calculate_order_statistics(report, date_range=None):
+    """
+    Calculate order statistics for the report's time range.
+    
+    date_range can be given to reuse the result of get_date_range_for_report.
+    """
     Order = get_model("provider_services", "Order")
     OrderReportResult = get_model("stat_analysis", "OrderReportResult")
     
-    start_date, end_date = get_date_range_for_report(report)
+    start_date, end_date = date_range or get_date_range_for_report(report)
     
     # Get all orders in the time range
     orders_in_period = Order.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date
+        created_at__range=(start_date, end_date)
+    )
+    
+    # Calculate the order totals, orders per status and the average processing
+    # time of completed orders in a single pass over the orders in the period
+    processing_time_expr = ExpressionWrapper(
+        F('completed_at') - F('created_at'),
+        output_field=fields.DurationField()
+    )
+    order_stats = orders_in_period.aggregate(
+        total_orders=Count('pk'),
+        total_revenue=Sum('total_price'),
+        avg_processing_time=Avg(
+            processing_time_expr, filter=Q(status='completed', completed_at__isnull=False)
+        ),
+        **{f'orders_{status}': Count('pk', filter=Q(status=status)) for status, _ in Order.ORDER_STATUS_CHOICES}
     )
     
-    # Calculate basic order statistics
-    total_orders = orders_in_period.count()
-    total_revenue = orders_in_period.aggregate(sum=Sum('total_price'))['sum'] or 0
+    total_orders = order_stats['total_orders']
+    total_revenue = order_stats['total_revenue'] or 0
     average_order_value = Decimal('0.00')
     if total_orders > 0:
         average_order_value = total_revenue / total_orders
     
-    # Calculate orders per status
-    orders_draft = orders_in_period.filter(status='draft').count()
-    orders_submitted = orders_in_period.filter(status='submitted').count()
-    orders_in_progress = orders_in_period.filter(status='in_progress').count()
-    orders_completed = orders_in_period.filter(status='completed').count()
-    orders_cancelled = orders_in_period.filter(status='cancelled').count()
+    orders_draft = order_stats['orders_draft']
+    orders_submitted = order_stats['orders_submitted']
+    orders_in_progress = order_stats['orders_in_progress']
+    orders_completed = order_stats['orders_completed']
+    orders_cancelled = order_stats['orders_cancelled']
     
-    # Calculate average processing time (for completed orders)
-    completed_orders = orders_in_period.filter(status='completed', completed_at__isnull=False)
+    # The average is None only when there are no completed orders,
+    # orders completed right away give an average of zero days
     avg_processing_time = None
-    if completed_orders.exists():
-        # Calculate difference in days
-        processing_time_expr = ExpressionWrapper(
-            F('completed_at') - F('created_at'),
-            output_field=fields.DurationField()
-        )
-        avg_time = completed_orders.annotate(
-            processing_time=processing_time_expr
-        ).aggregate(avg=Avg('processing_time'))['avg']
-        
-        if avg_time:
-            avg_processing_time = avg_time.total_seconds() / (24 * 3600)  # Convert to days
+    avg_time = order_stats['avg_processing_time']
+    if avg_time is not None:
+        avg_processing_time = avg_time.total_seconds() / (24 * 3600)  # Convert to days
     
-    # Get or create order report result
-    order_result, created = OrderReportResult.objects.get_or_create(
+    # Create or update order report result
+    order_result, _ = OrderReportResult.objects.update_or_create(
         report=report,
         defaults={
             'total_orders': total_orders,
@@ -172,115 +179,107 @@ def calculate_order_statistics(report):
             'average_order_value': average_order_value,
             'orders_draft': orders_draft,
             'orders_submitted': orders_submitted,
-            'orders_in_progress': orders_in_period.filter(status='in_progress').count(),
+            'orders_in_progress': orders_in_progress,
             'orders_completed': orders_completed,
             'orders_cancelled': orders_cancelled,
             'avg_processing_time': avg_processing_time
         }
     )
     
-    if not created:
-        # Update existing report
-        order_result.total_orders = total_orders
-        order_result.total_revenue = total_revenue
-        order_result.average_order_value = average_order_value
-        order_result.orders_draft = orders_draft
-        order_result.orders_submitted = orders_submitted
-        order_result.orders_in_progress = orders_in_period.filter(status='in_progress').count()
-        order_result.orders_completed = orders_completed
-        order_result.orders_cancelled = orders_cancelled
-        order_result.avg_processing_time = avg_processing_time
-        order_result.save()
-    
     return order_result
 
 
-def calculate_user_statistics(report):
-    """Calculate user statistics for the report's time range."""
+def calculate_leaderboard(report, kind, orders, profile_field):
+    """
+    Rank the profiles referenced by profile_field by their number of orders.
+    
+    The orders are grouped per profile in a single query and the best
+    LEADERBOARD_SIZE profiles are returned as unsaved leaderboard entries.
+    Ties are ranked by the primary key of the profile.
+    """
+    ReportLeaderboardEntry = get_model("stat_analysis", "ReportLeaderboardEntry")
+    
+    rows = list(orders.order_by().values(profile_field).annotate(
+        user_id=F(f'{profile_field}__user'),
+        orders_count=Count('pk'),
+        revenue=Sum('total_price')
+    ).order_by('-orders_count', profile_field)[:LEADERBOARD_SIZE])
+    
+    return [
+        ReportLeaderboardEntry(
+            report=report,
+            kind=kind,
+            rank=rank,
+            user_id=row['user_id'],
+            orders_count=row['orders_count'],
+            revenue=row['revenue'] or 0
+        )
+        for rank, row in enumerate(rows, start=1)
+    ]
+
+
+def calculate_user_statistics(report, date_range=None):
+    """
+    Calculate user statistics for the report's time range.
+    
+    date_range can be given to reuse the result of get_date_range_for_report.
+    """
     User = get_model("auth", "User")
     Order = get_model("provider_services", "Order")
     UserReportResult = get_model("stat_analysis", "UserReportResult")
-    AccountManager = get_model("provider_services", "AccountManager")
-    Customer = get_model("provider_services", "Customer")
+    ReportLeaderboardEntry = get_model("stat_analysis", "ReportLeaderboardEntry")
     
-    start_date, end_date = get_date_range_for_report(report)
+    start_date, end_date = date_range or get_date_range_for_report(report)
     
-    # Get active users in the time range
-    active_users = User.objects.filter(
-        last_login__gte=start_date,
-        last_login__lte=end_date
+    # Count the active users, new customers and active account managers of the
+    # time range in a single query, each user has at most one profile of each kind
+    active = Q(last_login__isnull=False, last_login__range=(start_date, end_date))
+    joined = Q(date_joined__range=(start_date, end_date))
+    user_stats = User.objects.filter(active | joined).aggregate(
+        total_active_users=Count('pk', filter=active),
+        new_customers=Count('pk', filter=joined & Q(customer_profile__isnull=False)),
+        active_managers=Count('pk', filter=active & Q(account_manager_profile__isnull=False))
     )
+    total_active_users = user_stats['total_active_users']
+    new_customers = user_stats['new_customers']
+    active_managers = user_stats['active_managers']
     
-    # Get new customers in the time range
-    new_customers = Customer.objects.filter(
-        user__date_joined__gte=start_date,
-        user__date_joined__lte=end_date
-    ).count()
-    
-    # Get active account managers 
-    active_managers = AccountManager.objects.filter(
-        user__in=active_users
-    ).count()
+    # Rank account managers and customers by their orders in the time range
+    orders_in_period = Order.objects.filter(
+        created_at__range=(start_date, end_date)
+    )
+    manager_entries = calculate_leaderboard(report, 'manager', orders_in_period, 'account_manager')
+    # Every order has a customer as well as an account manager, so without
+    # ranked managers there are no orders in the time range to rank customers by
+    customer_entries = []
+    if manager_entries:
+        customer_entries = calculate_leaderboard(report, 'customer', orders_in_period, 'customer')
+    ReportLeaderboardEntry.objects.filter(report=report).delete()
+    ReportLeaderboardEntry.objects.bulk_create(manager_entries + customer_entries, batch_size=1000)
     
-    # Find top performing account manager based on orders
-    top_manager = None
+    # The top performers are the first entries of the leaderboards
+    top_manager_id = None
     top_manager_orders = 0
     top_manager_revenue = Decimal('0.00')
+    if manager_entries:
+        top_manager_id = manager_entries[0].user_id
+        top_manager_orders = manager_entries[0].orders_count
+        top_manager_revenue = manager_entries[0].revenue
     
-    managers = AccountManager.objects.all()
-    for manager in managers:
-        manager_orders = Order.objects.filter(
-            account_manager=manager,
-            created_at__gte=start_date,
-            created_at__lte=end_date
-        )
-        order_count = manager_orders.count()
-        revenue = manager_orders.aggregate(sum=Sum('total_price'))['sum'] or 0
-        
-        if order_count > top_manager_orders:
-            top_manager = manager.user
-            top_manager_orders = order_count
-            top_manager_revenue = revenue
-    
-    # Find top customer based on orders
-    top_customer = None
-    customers = Customer.objects.all()
-    top_customer_orders = 0
-    
-    for customer in customers:
-        customer_orders = Order.objects.filter(
-            customer=customer,
-            created_at__gte=start_date,
-            created_at__lte=end_date
-        ).count()
-        
-        if customer_orders > top_customer_orders:
-            top_customer = customer.user
-            top_customer_orders = customer_orders
+    top_customer_id = customer_entries[0].user_id if customer_entries else None
     
-    # Get or create user report result
-    user_result, created = UserReportResult.objects.get_or_create(
+    # Create or update user report result
+    user_result, _ = UserReportResult.objects.update_or_create(
         report=report,
         defaults={
-            'total_active_users': active_users.count(),
+            'total_active_users': total_active_users,
             'new_customers': new_customers,
             'active_account_managers': active_managers,
-            'top_performing_account_manager': top_manager,
-            'top_customer': top_customer,
+            'top_performing_account_manager_id': top_manager_id,
+            'top_customer_id': top_customer_id,
             'total_orders_by_top_manager': top_manager_orders,
             'total_revenue_by_top_manager': top_manager_revenue
         }
     )
     
-    if not created:
-        # Update existing report
-        user_result.total_active_users = active_users.count()
-        user_result.new_customers = new_customers
-        user_result.active_account_managers = active_managers
-        user_result.top_performing_account_manager = top_manager
-        user_result.top_customer = top_customer
-        user_result.total_orders_by_top_manager = top_manager_orders
-        user_result.total_revenue_by_top_manager = top_manager_revenue
-        user_result.save()
-    
     return user_result
\ No newline at end of file
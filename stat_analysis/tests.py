@@ -5,10 +5,12 @@ Some tests are generated by LLM.
 from decimal import Decimal
 import datetime
 import uuid
+from unittest import mock
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db import models
+from django.db import connection, models
 
 from provider_services.models import Customer, AccountManager, ServiceProvider, Service, Order, OrderItem
 from execution.models import Job
@@ -300,7 +302,7 @@ class OrderStatisticsTest(TestCase):
         # Create a mock filter function
         def mock_filter(*args, **kwargs):
             # If filtering by date range (for the report period)
-            if 'created_at__gte' in kwargs and 'created_at__lte' in kwargs:
+            if 'created_at__range' in kwargs:
                 # Return orders 1-5 for date range queries (simulate Q1-Q2 2023)
                 return Order.objects.filter(pk__in=[
                     self.order1.pk, self.order2.pk, self.order3.pk, 
@@ -477,7 +479,7 @@ class UserStatisticsTest(TestCase):
         # Mock Order.objects.filter to return the expected data for our test
         def mock_filter(*args, **kwargs):
             # If filtering for orders by date range
-            if 'created_at__gte' in kwargs and 'created_at__lte' in kwargs:
+            if 'created_at__range' in kwargs:
                 return Order.objects.all()  # Return all orders for date range queries
             
             # When checking for orders by account manager
@@ -629,15 +631,17 @@ class ReportCreationTest(TestCase):
     def test_automatic_statistics_calculation(self):
         """Test that statistics are automatically calculated when creating a report"""
         # Create a report that should trigger automatic statistics calculation
-        report = Report.objects.create(
-            title="Auto Calc Test Report",
-            report_type="combined",
-            quarter_from="Q1",
-            year_from=2023,
-            quarter_to="Q1",
-            year_to=2023,
-            created_by=self.user
-        )
+        # once the transaction is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            report = Report.objects.create(
+                title="Auto Calc Test Report",
+                report_type="combined",
+                quarter_from="Q1",
+                year_from=2023,
+                quarter_to="Q1",
+                year_to=2023,
+                created_by=self.user
+            )
         
         # Check that the JobReportResult was created
         job_result = JobReportResult.objects.filter(report=report).first()
@@ -650,4 +654,199 @@ class ReportCreationTest(TestCase):
         
         # Check that the UserReportResult was created
         user_result = UserReportResult.objects.filter(report=report).first()
-        self.assertIsNotNone(user_result)
\ No newline at end of file
+        self.assertIsNotNone(user_result)
+    
+    def test_statistics_recalculated_only_when_settings_change(self):
+        """Test that saving a report only recalculates statistics when its settings change"""
+        with self.captureOnCommitCallbacks(execute=True):
+            report = Report.objects.create(
+                title="Recalc Test Report",
+                report_type="job",
+                quarter_from="Q1",
+                year_from=2023,
+                quarter_to="Q1",
+                year_to=2023,
+                created_by=self.user
+            )
+        
+        report = Report.objects.get(pk=report.pk)
+        report.title = "Renamed Report"
+        with self.captureOnCommitCallbacks() as callbacks:
+            report.save()
+        self.assertEqual(len(callbacks), 0)
+        
+        report.quarter_to = "Q2"
+        with self.captureOnCommitCallbacks() as callbacks:
+            report.save()
+        self.assertEqual(len(callbacks), 1)
+    
+    def test_deferred_report_settings(self):
+        """Test that reports loaded with deferred settings only recalculate when a setting changes"""
+        report = Report.objects.create(
+            title="Deferred Test Report",
+            report_type="job",
+            quarter_from="Q1",
+            year_from=2023,
+            quarter_to="Q1",
+            year_to=2023,
+            created_by=self.user
+        )
+        
+        report = Report.objects.defer('year_to').get(pk=report.pk)
+        self.assertEqual(report.year_to, 2023)
+        report.title = "Renamed Report"
+        with self.captureOnCommitCallbacks() as callbacks:
+            report.save()
+        self.assertEqual(len(callbacks), 0)
+        
+        report = Report.objects.only('title').get(pk=report.pk)
+        report.title = "Renamed Again"
+        with self.captureOnCommitCallbacks() as callbacks:
+            report.save()
+        self.assertEqual(len(callbacks), 0)
+        
+        report = Report.objects.only('title').get(pk=report.pk)
+        report.year_to = 2024
+        with self.captureOnCommitCallbacks() as callbacks:
+            report.save()
+        self.assertEqual(len(callbacks), 1)
+    
+    def test_failed_statistics_calculation_logged(self):
+        """Test that a failed statistics calculation is logged and keeps the saved report"""
+        with mock.patch('stat_analysis.stat_utils.calculate_report_statistics', side_effect=ValueError):
+            with self.assertLogs('stat_analysis.models.report', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    report = Report.objects.create(
+                        title="Failing Report",
+                        report_type="job",
+                        quarter_from="Q1",
+                        year_from=2023,
+                        quarter_to="Q1",
+                        year_to=2023,
+                        created_by=self.user
+                    )
+        
+        self.assertTrue(Report.objects.filter(pk=report.pk).exists())
+    
+    def test_leaderboard_calculation(self):
+        """Test that the top performers are ranked on the report leaderboard"""
+        # A second manager with more orders in the period ranks first
+        other_manager = AccountManager.objects.create(
+            user=User.objects.create(username="othermanager", password="password")
+        )
+        for i in range(2):
+            Order.objects.create(
+                customer=self.customer,
+                account_manager=other_manager,
+                title=f"Other Order {i}",
+                status="submitted",
+                total_price=Decimal("50.00")
+            )
+        
+        # Move all orders into the report period
+        Order.objects.update(created_at=timezone.make_aware(datetime.datetime(2023, 3, 1)))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            report = Report.objects.create(
+                title="Leaderboard Test Report",
+                report_type="user",
+                quarter_from="Q1",
+                year_from=2023,
+                quarter_to="Q1",
+                year_to=2023,
+                created_by=self.user
+            )
+        
+        self.assertEqual(
+            list(report.leaderboard_entries.values_list('kind', 'rank', 'user', 'orders_count', 'revenue')),
+            [
+                ('customer', 1, self.user2.pk, 3, Decimal("300.00")),
+                ('manager', 1, other_manager.user_id, 2, Decimal("100.00")),
+                ('manager', 2, self.user.pk, 1, Decimal("200.00")),
+            ]
+        )
+        
+        user_result = UserReportResult.objects.get(report=report)
+        self.assertEqual(user_result.top_performing_account_manager_id, other_manager.user_id)
+        self.assertEqual(user_result.top_customer_id, self.user2.pk)
+        self.assertEqual(user_result.total_orders_by_top_manager, 2)
+        self.assertEqual(user_result.total_revenue_by_top_manager, Decimal("100.00"))
+    
+    def test_user_statistics_queries_independent_of_profiles(self):
+        """Test that the top performers are found without a query per manager, customer or ranked row"""
+        report = Report.objects.create(
+            title="Query Count Test Report",
+            report_type="user",
+            quarter_from="Q1",
+            year_from=2023,
+            quarter_to="Q1",
+            year_to=2023,
+            created_by=self.user
+        )
+        # Count the queries of a recalculation, when the user result already exists
+        Order.objects.update(created_at=timezone.make_aware(datetime.datetime(2023, 3, 1)))
+        calculate_user_statistics(report)
+        with CaptureQueriesContext(connection) as context:
+            calculate_user_statistics(report)
+        self.assertEqual(report.leaderboard_entries.count(), 2)
+        
+        for i in range(3):
+            manager = AccountManager.objects.create(
+                user=User.objects.create(username=f"manager{i}", password="password")
+            )
+            customer = Customer.objects.create(
+                user=User.objects.create(username=f"customer{i}", password="password")
+            )
+            Order.objects.create(
+                customer=customer,
+                account_manager=manager,
+                title=f"Other Order {i}",
+                status="submitted"
+            )
+        # Move the new orders into the report period, so they are ranked as well
+        Order.objects.update(created_at=timezone.make_aware(datetime.datetime(2023, 3, 1)))
+        
+        with self.assertNumQueries(len(context.captured_queries)):
+            calculate_user_statistics(report)
+        self.assertEqual(report.leaderboard_entries.count(), 8)
+    
+    def test_user_activity_counts(self):
+        """Test that active users, new customers and active account managers are counted"""
+        in_period = timezone.make_aware(datetime.datetime(2023, 2, 1))
+        # The account manager logged in during the period, the customer joined in it
+        User.objects.filter(pk=self.user.pk).update(last_login=in_period)
+        User.objects.filter(pk=self.user2.pk).update(date_joined=in_period)
+        User.objects.create(username="inactive", password="password", last_login=in_period.replace(year=2022))
+        
+        report = Report.objects.create(
+            title="User Activity Test Report",
+            report_type="user",
+            quarter_from="Q1",
+            year_from=2023,
+            quarter_to="Q1",
+            year_to=2023,
+            created_by=self.user
+        )
+        user_result = calculate_user_statistics(report)
+        
+        self.assertEqual(user_result.total_active_users, 1)
+        self.assertEqual(user_result.new_customers, 1)
+        self.assertEqual(user_result.active_account_managers, 1)
+    
+    def test_user_statistics_without_orders(self):
+        """Test that a period without orders has an empty leaderboard and no top performers"""
+        report = Report.objects.create(
+            title="Empty Period Test Report",
+            report_type="user",
+            quarter_from="Q1",
+            year_from=2020,
+            quarter_to="Q1",
+            year_to=2020,
+            created_by=self.user
+        )
+        user_result = calculate_user_statistics(report)
+        
+        self.assertFalse(report.leaderboard_entries.exists())
+        self.assertIsNone(user_result.top_performing_account_manager)
+        self.assertIsNone(user_result.top_customer)
+        self.assertEqual(user_result.total_orders_by_top_manager, 0)